@@ -3,14 +3,18 @@ YouTube Transcript API - Flask Application
 Scalable web service for transcribing YouTube videos
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from cachetools import TTLCache
-import hashlib
+import orjson
+import xxhash
 import logging
+import os
 import sys
+from cache import MemoryCache, RedisCache, SingleFlight
+from rate_limiter import MemoryTokenBucket, RedisTokenBucket, token_bucket_limit
 from transcript_service import TranscriptService
 
 # Configure logging
@@ -21,21 +25,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson, used by jsonify and request.get_json"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # orjson already emits UTF-8 bytes, skip the str round trip of dumps()
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
 # Initialize Flask app
 app = Flask(__name__, static_folder='static')
-CORS(app)
+app.json = ORJSONProvider(app)
+# Expose the stream endpoint's metadata headers to browser clients
+CORS(app, expose_headers=['X-Video-Id', 'X-Transcript-Language'])
+
+# Optional Redis: shares cache and rate limit counters between workers
+REDIS_URL = os.environ.get('REDIS_URL')
 
 # Rate limiting: 100 requests per hour per IP
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["100 per hour"],
-    storage_uri="memory://"
+    storage_uri=REDIS_URL or "memory://"
 )
 
+# Token bucket for the transcript endpoint: bursts up to 50 requests,
+# refilled at 50 per hour per IP
+if REDIS_URL:
+    transcript_bucket = RedisTokenBucket(REDIS_URL, capacity=50, period=3600)
+else:
+    transcript_bucket = MemoryTokenBucket(capacity=50, period=3600)
+
 # Cache: Store transcripts for 1 hour (3600 seconds)
-# Max 1000 entries to prevent memory overflow
-transcript_cache = TTLCache(maxsize=1000, ttl=3600)
+# In memory: max 32 MB of compressed entries to prevent memory overflow
+if REDIS_URL:
+    transcript_cache = RedisCache(REDIS_URL, ttl=3600)
+else:
+    transcript_cache = MemoryCache(max_bytes=32 * 1024 * 1024, ttl=3600)
+
+# One in-flight fetch per cache key, shared by concurrent requests
+transcript_fetches = SingleFlight()
 
 # Initialize transcript service
 transcript_service = TranscriptService()
@@ -47,8 +85,119 @@ def index():
     return send_from_directory('static', 'index.html')
 
 
+def parse_transcript_request():
+    """
+    Parse and validate the JSON body shared by the transcript endpoints
+    
+    Returns:
+        Tuple of ((video_id, languages, include_timestamps), None) when the
+        request is valid, or (None, error_response) when it is not
+    """
+    data = request.get_json()
+    
+    if not data or 'url' not in data:
+        return None, (jsonify({
+            'success': False,
+            'error': 'URL obrigatória',
+            'message': 'Por favor, forneça uma URL ou ID de vídeo do YouTube.'
+        }), 400)
+    
+    url = data['url'].strip()
+    languages = data.get('languages', None)
+    include_timestamps = data.get('include_timestamps', True)
+    
+    # A single language code is accepted as shorthand for a one-item list
+    if isinstance(languages, str):
+        languages = [languages]
+    if languages is not None and not (
+        isinstance(languages, list) and all(isinstance(code, str) for code in languages)
+    ):
+        return None, (jsonify({
+            'success': False,
+            'error': 'Idiomas inválidos',
+            'message': 'O campo "languages" deve ser uma lista de códigos de idioma, ex.: ["pt", "en"].'
+        }), 400)
+    
+    logger.info(f"Nova requisição - URL: {url[:50]}... Idiomas: {languages}")
+    
+    # Extract video ID
+    video_id = transcript_service.extract_video_id(url)
+    
+    if not video_id:
+        logger.warning(f"Falha ao extrair video_id da URL: {url}")
+        return None, (jsonify({
+            'success': False,
+            'error': 'URL inválida',
+            'message': 'Não foi possível extrair o ID do vídeo. Verifique se a URL está correta.'
+        }), 400)
+    
+    logger.info(f"Video ID extraído: {video_id}")
+    
+    return (video_id, languages, include_timestamps), None
+
+
+def fetch_error_response(video_id, e):
+    """JSON 400 response for an error raised while fetching a transcript"""
+    logger.error(f"ERRO ao buscar transcrição - Video: {video_id}, Tipo: {type(e).__name__}, Mensagem: {str(e)}")
+    error_info = transcript_service.get_error_message(e)
+    return jsonify({
+        'success': False,
+        **error_info
+    }), 400
+
+
+def internal_error_response(e):
+    """JSON 500 response for an unexpected error while handling a request"""
+    logger.error(f"ERRO CRÍTICO na requisição: {type(e).__name__} - {str(e)}")
+    return jsonify({
+        'success': False,
+        'error': 'Erro interno',
+        'message': f'Erro ao processar requisição: {str(e)}'
+    }), 500
+
+
+def fetch_transcript_result(video_id, languages, include_timestamps, cache_key):
+    """Fetch and format a transcript, then store the response in the cache"""
+    # A previous fetch may have filled the cache after this request missed it
+    cached_result = transcript_cache.get(cache_key)
+    if cached_result is not None:
+        logger.info(f"Retornando do cache para video_id: {video_id}")
+        cached_result['cached'] = True
+        return cached_result
+    
+    logger.info(f"Buscando transcrição para video_id: {video_id}")
+    transcript_list, language = transcript_service.get_transcript(
+        video_id, 
+        languages=languages
+    )
+    
+    logger.info(f"Transcrição obtida com sucesso! Idioma: {language}, Segmentos: {len(transcript_list)}")
+    
+    # Format transcript
+    formatted_transcript = transcript_service.format_transcript(
+        transcript_list,
+        include_timestamps=include_timestamps
+    )
+    
+    # Prepare response
+    result = {
+        'success': True,
+        'video_id': video_id,
+        'language': language,
+        'transcript': formatted_transcript,
+        'total_segments': len(transcript_list),
+        'cached': False
+    }
+    
+    # Store in cache
+    transcript_cache[cache_key] = result
+    
+    return result
+
+
 @app.route('/api/transcript', methods=['POST'])
-@limiter.limit("50 per hour")  # More restrictive for API endpoint
+@limiter.exempt  # Limited by transcript_bucket instead
+@token_bucket_limit(transcript_bucket, key_func=get_remote_address)
 def get_transcript():
     """
     API endpoint to fetch YouTube video transcript
@@ -70,93 +219,90 @@ def get_transcript():
     }
     """
     try:
-        # Parse request data
-        data = request.get_json()
-        
-        if not data or 'url' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'URL obrigatória',
-                'message': 'Por favor, forneça uma URL ou ID de vídeo do YouTube.'
-            }), 400
-        
-        url = data['url'].strip()
-        languages = data.get('languages', None)
-        include_timestamps = data.get('include_timestamps', True)
-        
-        logger.info(f"Nova requisição - URL: {url[:50]}... Idiomas: {languages}")
-        
-        # Extract video ID
-        video_id = transcript_service.extract_video_id(url)
-        
-        if not video_id:
-            logger.warning(f"Falha ao extrair video_id da URL: {url}")
-            return jsonify({
-                'success': False,
-                'error': 'URL inválida',
-                'message': 'Não foi possível extrair o ID do vídeo. Verifique se a URL está correta.'
-            }), 400
+        params, error_response = parse_transcript_request()
+        if error_response:
+            return error_response
+        video_id, languages, include_timestamps = params
         
-        logger.info(f"Video ID extraído: {video_id}")
-        
-        # Create cache key
-        cache_key = hashlib.md5(
-            f"{video_id}:{languages}:{include_timestamps}".encode()
-        ).hexdigest()
+        # Create cache key: one 64-bit integer folded from the request fields
+        # (used as is by MemoryCache, formatted as hex by RedisCache)
+        cache_key = (
+            xxhash.xxh3_64_intdigest(video_id.encode())
+            ^ xxhash.xxh3_64_intdigest(repr(languages).encode())
+            ^ (1 if include_timestamps else 0)
+        )
         
         # Check cache first
-        if cache_key in transcript_cache:
+        cached_result = transcript_cache.get(cache_key)
+        if cached_result is not None:
             logger.info(f"Retornando do cache para video_id: {video_id}")
-            cached_result = transcript_cache[cache_key]
             cached_result['cached'] = True
             return jsonify(cached_result), 200
         
-        # Fetch transcript
+        # Fetch transcript (concurrent misses for the same key share one fetch)
         try:
-            logger.info(f"Buscando transcrição para video_id: {video_id}")
-            transcript_list, language = transcript_service.get_transcript(
-                video_id, 
-                languages=languages
+            result = transcript_fetches.do(
+                cache_key,
+                lambda: fetch_transcript_result(video_id, languages, include_timestamps, cache_key)
             )
-            
-            logger.info(f"Transcrição obtida com sucesso! Idioma: {language}, Segmentos: {len(transcript_list)}")
-            
-            # Format transcript
-            formatted_transcript = transcript_service.format_transcript(
-                transcript_list,
-                include_timestamps=include_timestamps
-            )
-            
-            # Prepare response
-            result = {
-                'success': True,
-                'video_id': video_id,
-                'language': language,
-                'transcript': formatted_transcript,
-                'total_segments': len(transcript_list),
-                'cached': False
-            }
-            
-            # Store in cache
-            transcript_cache[cache_key] = result
-            
             return jsonify(result), 200
             
         except Exception as e:
-            logger.error(f"ERRO ao buscar transcrição - Video: {video_id}, Tipo: {type(e).__name__}, Mensagem: {str(e)}")
-            error_info = transcript_service.get_error_message(e)
-            return jsonify({
-                'success': False,
-                **error_info
-            }), 400
+            return fetch_error_response(video_id, e)
     
     except Exception as e:
-        logger.error(f"ERRO CRÍTICO na requisição: {type(e).__name__} - {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'Erro interno',
-            'message': f'Erro ao processar requisição: {str(e)}'
-        }), 500
+        return internal_error_response(e)
+
+
+@app.route('/api/transcript/stream', methods=['POST'])
+@limiter.exempt  # Limited by transcript_bucket instead
+@token_bucket_limit(transcript_bucket, key_func=get_remote_address)
+def stream_transcript():
+    """
+    API endpoint to stream a YouTube video transcript as NDJSON
+    
+    Request body: same as /api/transcript (include_timestamps is ignored)
+    
+    Response (application/x-ndjson, one segment per line):
+    {"ts": 0.0, "text": "first segment"}
+    {"ts": 2.5, "text": "second segment"}
+    
+    Headers X-Video-Id and X-Transcript-Language carry the metadata.
+    Not cached: segments are written out as they are serialized.
+    """
+    try:
+        params, error_response = parse_transcript_request()
+        if error_response:
+            return error_response
+        video_id, languages, _ = params
+        
+        # Fetch before streaming so errors still get a JSON status response
+        try:
+            logger.info(f"Streaming transcrição para video_id: {video_id}")
+            transcript_list, language = transcript_service.get_transcript(
+                video_id,
+                languages=languages
+            )
+        except Exception as e:
+            return fetch_error_response(video_id, e)
+        
+        def generate():
+            for start, text in zip(transcript_list.starts, transcript_list.texts):
+                text = text.strip()
+                if text:
+                    yield orjson.dumps({'ts': start, 'text': text}) + b'\n'
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={
+                'X-Video-Id': video_id,
+                'X-Transcript-Language': language
+            }
+        )
+    
+    except Exception as e:
+        return internal_error_response(e)
 
 
 @app.route('/api/languages/<video_id>', methods=['GET'])
@@ -194,8 +340,9 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'cache_size': len(transcript_cache),
-        'cache_maxsize': transcript_cache.maxsize
+        'cache_size': transcript_cache.currsize,
+        'cache_bytes': transcript_cache.nbytes,
+        'cache_maxbytes': transcript_cache.maxbytes
     }), 200
 
 
@@ -209,11 +356,20 @@ def ratelimit_handler(e):
     }), 429
 
 
+@app.errorhandler(503)
+def unavailable_handler(e):
+    """Handle a rate limit backend that can't be reached"""
+    return jsonify({
+        'success': False,
+        'error': 'Serviço indisponível',
+        'message': 'O serviço está temporariamente indisponível. Tente novamente em instantes.'
+    }), 503
+
+
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5000))
     print("🚀 YouTube Transcript API iniciando...")
     print(f"📍 Servidor rodando em: http://0.0.0.0:{port}")
     print("📊 Rate limit: 100 requisições/hora")
-    print("💾 Cache: 1 hora TTL, max 1000 entradas")
+    print("💾 Cache: 1 hora TTL, max 32 MB comprimidos")
     app.run(debug=False, host='0.0.0.0', port=port)
@@ -0,0 +1,136 @@
+"""
+Transcript caches
+In-process TTL cache for single-process deployments, Redis for sharing
+entries between gunicorn workers and hosts. Both store zstd-compressed JSON:
+transcript text compresses several times over, so more entries fit per MB.
+SingleFlight collapses concurrent cache misses for the same key into one fill.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+import orjson
+import redis
+import zstandard
+from cachetools import TTLCache
+
+# zstd contexts are not thread-safe, keep one pair per thread
+_zstd = threading.local()
+
+
+def _pack(value: Any) -> bytes:
+    """Serialize and compress a cache value"""
+    compressor = getattr(_zstd, 'compressor', None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=3)
+    return compressor.compress(orjson.dumps(value))
+
+
+def _unpack(blob: bytes) -> Any:
+    """Decompress and deserialize a cache value"""
+    decompressor = getattr(_zstd, 'decompressor', None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    return orjson.loads(decompressor.decompress(blob))
+
+
+class MemoryCache:
+    """
+    Thread-safe in-process TTL cache, bounded by compressed bytes
+
+    Entries are weighed by the size of their compressed blob rather than
+    counted, so better compression directly means more cached transcripts.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self._cache = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=len)
+        self._lock = threading.Lock()
+
+    @property
+    def maxbytes(self) -> int:
+        return self._cache.maxsize
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return self._cache.currsize
+
+    @property
+    def currsize(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def get(self, key: int) -> Optional[Any]:
+        with self._lock:
+            blob = self._cache.get(key)
+        if blob is None:
+            return None
+        return _unpack(blob)
+
+    def __setitem__(self, key: int, value: Any) -> None:
+        blob = _pack(value)
+        if len(blob) > self._cache.maxsize:
+            return  # larger than the whole budget, not worth evicting everything
+        with self._lock:
+            self._cache[key] = blob
+
+
+class RedisCache:
+    """TTL cache stored in Redis, shared by every worker using the same URL"""
+
+    # Eviction is left to the Redis server's maxmemory policy, and counting
+    # entries would mean scanning the shared keyspace, so none is reported
+    maxbytes = None
+    nbytes = None
+    currsize = None
+
+    def __init__(self, url: str, ttl: int, prefix: str = 'transcript:'):
+        self._redis = redis.Redis.from_url(url)
+        self._ttl = ttl
+        self._prefix = prefix
+
+    def _key(self, key: int) -> str:
+        return f"{self._prefix}{key:016x}"
+
+    def get(self, key: int) -> Optional[Any]:
+        blob = self._redis.get(self._key(key))
+        if blob is None:
+            return None
+        return _unpack(blob)
+
+    def __setitem__(self, key: int, value: Any) -> None:
+        self._redis.set(self._key(key), _pack(value), ex=self._ttl)
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers wait for its result"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Call fn, or wait for the in-flight call for key and share its result"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            # Re-raises the leader's exception, if it failed
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            # BaseException too: waiters must never be left on an unresolved
+            # future, e.g. when a worker is shut down mid-fetch
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
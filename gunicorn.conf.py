@@ -0,0 +1,18 @@
+"""
+Gunicorn configuration
+Threaded workers: a transcript request spends most of its time waiting on
+YouTube, so one process serves many requests concurrently from its threads
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = 'gthread'
+
+# Without REDIS_URL, cache and rate limit counters live in process memory,
+# so keep one worker by default and scale with threads
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# YouTube fetches can be slow; don't kill workers waiting on them
+timeout = 60
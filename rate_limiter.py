@@ -0,0 +1,106 @@
+"""
+Token bucket rate limiting
+Allows short bursts up to the bucket capacity while holding the long-run
+rate, instead of the hard resets of fixed-window counters
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+import redis
+from flask import abort
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryTokenBucket:
+    """
+    In-process token bucket per key
+
+    Tokens are fixed-point integers in units of refill time (nanoseconds), so
+    refilling adds the elapsed time and a request costs one refill interval,
+    with no float rounding.
+    """
+
+    def __init__(self, capacity: int, period: int, max_keys: int = 100_000):
+        self._cost = period * 1_000_000_000 // capacity
+        self._capacity = capacity * self._cost
+        self._max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, last_refill_ns)
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic_ns()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self._capacity, now))
+            tokens = min(self._capacity, tokens + now - last)
+            allowed = tokens >= self._cost
+            self._buckets[key] = (tokens - self._cost * allowed, now)
+            # Least recently seen keys are evicted first; they come back full
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+class RedisTokenBucket:
+    """Token bucket per key stored in Redis, shared by every worker"""
+
+    # Same fixed-point scheme as MemoryTokenBucket, in microseconds of the
+    # Redis server clock. Refill, check and decrement run atomically.
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local cost = tonumber(ARGV[2])
+    local t = redis.call('TIME')
+    local now = t[1] * 1000000 + t[2]
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local last = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + now - last)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', string.format('%d', tokens),
+               'ts', string.format('%d', now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / 1000))
+    return allowed
+    """
+
+    def __init__(self, url: str, capacity: int, period: int, prefix: str = 'bucket:'):
+        self._cost = period * 1_000_000 // capacity
+        self._capacity = capacity * self._cost
+        self._prefix = prefix
+        self._script = redis.Redis.from_url(url).register_script(self._SCRIPT)
+
+    def allow(self, key: str) -> bool:
+        return bool(self._script(
+            keys=[f"{self._prefix}{key}"],
+            args=[self._capacity, self._cost]
+        ))
+
+
+def token_bucket_limit(bucket, key_func: Callable[[], str]):
+    """
+    Decorator rejecting a Flask view with 429 when the caller's bucket is empty
+
+    Fails closed with 503 when the Redis bucket can't be reached: the
+    transcript cache lives on the same server, and letting requests through
+    unlimited during an outage would send every one of them to YouTube.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                allowed = bucket.allow(key_func())
+            except redis.RedisError as e:
+                logger.error(f"Rate limiter indisponível: {type(e).__name__} - {str(e)}")
+                abort(503)
+            if not allowed:
+                abort(429)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
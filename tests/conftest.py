@@ -0,0 +1,68 @@
+"""Fake YouTube transcript lists shared by the service and endpoint tests"""
+
+from types import SimpleNamespace
+
+import pytest
+from youtube_transcript_api._errors import NoTranscriptFound
+
+import transcript_service
+
+
+class FakeTranscript:
+    """Stands in for youtube_transcript_api.Transcript"""
+
+    def __init__(self, language_code, segments):
+        self.language_code = language_code
+        self._segments = segments  # [(start, text), ...]
+
+    def fetch(self):
+        return SimpleNamespace(snippets=[
+            SimpleNamespace(text=text, start=start, duration=1.0)
+            for start, text in self._segments
+        ])
+
+
+class FakeTranscriptList:
+    """Stands in for youtube_transcript_api.TranscriptList"""
+
+    def __init__(self, video_id, transcripts):
+        self.video_id = video_id
+        self._transcripts = transcripts
+        self.requested = []  # language codes passed to find_transcript
+
+    def __iter__(self):
+        return iter(self._transcripts)
+
+    def __str__(self):
+        return ', '.join(t.language_code for t in self._transcripts)
+
+    def find_transcript(self, language_codes):
+        self.requested.append(list(language_codes))
+        for code in language_codes:
+            for transcript in self._transcripts:
+                if transcript.language_code == code:
+                    return transcript
+        raise NoTranscriptFound(self.video_id, language_codes, self)
+
+
+class FakeYouTube:
+    """Serves FakeTranscriptLists for the videos registered in it"""
+
+    def __init__(self):
+        self.videos = {}  # video_id -> [FakeTranscript, ...] or an exception
+        self.lists = {}  # video_id -> last FakeTranscriptList served
+
+    def list_transcripts(self, video_id):
+        entry = self.videos[video_id]
+        if isinstance(entry, Exception):
+            raise entry
+        self.lists[video_id] = FakeTranscriptList(video_id, entry)
+        return self.lists[video_id]
+
+
+@pytest.fixture
+def youtube(monkeypatch):
+    """Replaces the cached YouTube lookup in transcript_service with a FakeYouTube"""
+    fake = FakeYouTube()
+    monkeypatch.setattr(transcript_service, '_list_transcripts', fake.list_transcripts)
+    return fake
@@ -0,0 +1,90 @@
+"""Tests for the Flask endpoints"""
+
+import orjson
+import pytest
+import redis
+from youtube_transcript_api._errors import TranscriptsDisabled
+
+import app as app_module
+from conftest import FakeTranscript
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_stream_writes_one_ndjson_line_per_segment(client, youtube):
+    youtube.videos[VIDEO_ID] = [
+        FakeTranscript('en', [(0.0, ' first '), (2.5, '   '), (4.0, 'second')])
+    ]
+    response = client.post('/api/transcript/stream', json={
+        'url': f'https://youtu.be/{VIDEO_ID}',
+        'languages': ['en']
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['X-Video-Id'] == VIDEO_ID
+    assert response.headers['X-Transcript-Language'] == 'en'
+    lines = response.data.splitlines()
+    assert [orjson.loads(line) for line in lines] == [
+        {'ts': 0.0, 'text': 'first'},
+        {'ts': 4.0, 'text': 'second'}
+    ]
+
+
+def test_stream_returns_json_400_when_fetch_fails(client, youtube):
+    youtube.videos[VIDEO_ID] = TranscriptsDisabled(VIDEO_ID)
+    response = client.post('/api/transcript/stream', json={'url': VIDEO_ID})
+    assert response.status_code == 400
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {
+        'success': False,
+        'error': 'Transcrições desabilitadas',
+        'message': 'Este vídeo não possui transcrições disponíveis.'
+    }
+
+
+@pytest.mark.parametrize('endpoint', ['/api/transcript', '/api/transcript/stream'])
+def test_missing_url_is_rejected(client, endpoint):
+    response = client.post(endpoint, json={})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'URL obrigatória'
+
+
+@pytest.mark.parametrize('endpoint', ['/api/transcript', '/api/transcript/stream'])
+def test_invalid_url_is_rejected(client, endpoint):
+    response = client.post(endpoint, json={'url': 'https://example.com/'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'URL inválida'
+
+
+def test_single_language_string_is_accepted(client, youtube):
+    youtube.videos[VIDEO_ID] = [FakeTranscript('en', [(0.0, 'hello')])]
+    response = client.post('/api/transcript/stream', json={'url': VIDEO_ID, 'languages': 'en'})
+    assert response.status_code == 200
+    assert response.headers['X-Transcript-Language'] == 'en'
+    assert youtube.lists[VIDEO_ID].requested[0][0] == 'en'
+
+
+@pytest.mark.parametrize('languages', [42, {'pt': True}, ['pt', 1]])
+def test_malformed_languages_are_rejected(client, languages):
+    response = client.post('/api/transcript', json={'url': VIDEO_ID, 'languages': languages})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Idiomas inválidos'
+
+
+def test_rate_limiter_outage_returns_json_503(client, monkeypatch):
+    def allow(key):
+        raise redis.ConnectionError('Connection refused')
+
+    monkeypatch.setattr(app_module.transcript_bucket, 'allow', allow)
+    response = client.post('/api/transcript', json={'url': VIDEO_ID})
+    assert response.status_code == 503
+    assert response.get_json() == {
+        'success': False,
+        'error': 'Serviço indisponível',
+        'message': 'O serviço está temporariamente indisponível. Tente novamente em instantes.'
+    }
@@ -0,0 +1,183 @@
+"""Tests for the transcript caches and the SingleFlight cache-fill helper"""
+
+import os
+import threading
+import time
+
+import fakeredis
+import pytest
+import redis
+
+from cache import MemoryCache, RedisCache, SingleFlight, _pack, _unpack
+
+RESULT = {
+    'success': True,
+    'video_id': 'dQw4w9WgXcQ',
+    'language': 'pt',
+    'transcript': '[00:00] Olá, mundo\n[00:02] transcrição',
+    'total_segments': 2,
+    'cached': False
+}
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis.Redis, 'from_url', staticmethod(lambda url: client))
+    return client
+
+
+def test_pack_round_trips_and_compresses():
+    value = dict(RESULT, transcript='[00:00] repetido\n' * 500)
+    blob = _pack(value)
+    assert _unpack(blob) == value
+    assert len(blob) < len(value['transcript']) // 10
+
+
+def test_memory_cache_round_trip():
+    cache = MemoryCache(max_bytes=1024 * 1024, ttl=60)
+    assert cache.get(1) is None
+    cache[1] = RESULT
+    assert cache.get(1) == RESULT
+    assert cache.currsize == 1
+    assert cache.nbytes == len(_pack(RESULT))
+
+
+def test_memory_cache_is_bounded_by_compressed_bytes():
+    entry_bytes = len(_pack(RESULT))
+    cache = MemoryCache(max_bytes=entry_bytes * 3, ttl=60)
+    for key in range(5):
+        cache[key] = RESULT
+    assert cache.currsize == 3
+    assert cache.nbytes <= cache.maxbytes
+    assert cache.get(0) is None
+    assert cache.get(4) == RESULT
+
+
+def test_memory_cache_skips_values_larger_than_the_budget():
+    cache = MemoryCache(max_bytes=len(_pack(RESULT)), ttl=60)
+    cache[1] = RESULT
+    cache[2] = dict(RESULT, transcript=os.urandom(4096).hex())
+    assert cache.get(1) == RESULT
+    assert cache.get(2) is None
+
+
+def test_redis_cache_round_trip_with_ttl(redis_client):
+    cache = RedisCache('redis://test', ttl=60)
+    assert cache.get(0xabc) is None
+    cache[0xabc] = RESULT
+    assert cache.get(0xabc) == RESULT
+    assert redis_client.keys() == [b'transcript:0000000000000abc']
+    assert 0 < redis_client.ttl('transcript:0000000000000abc') <= 60
+
+
+def test_redis_cache_does_not_report_sizes(redis_client):
+    cache = RedisCache('redis://test', ttl=60)
+    assert (cache.currsize, cache.nbytes, cache.maxbytes) == (None, None, None)
+
+
+def run_concurrently(count, target):
+    """Start count threads running target, return them once all have started"""
+    started = threading.Barrier(count + 1)
+
+    def runner():
+        started.wait()
+        target()
+
+    # Daemon threads: a stranded waiter fails the test instead of hanging pytest
+    threads = [threading.Thread(target=runner, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    return threads
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+    results = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'transcript'
+
+    threads = run_concurrently(8, lambda: results.append(flight.do('key', fetch)))
+    time.sleep(0.1)  # let every thread reach do() before the leader returns
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ['transcript'] * 8
+
+
+def test_different_keys_do_not_wait_on_each_other():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+
+
+def test_key_is_released_after_the_call():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+
+
+def test_exception_reaches_leader_and_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fetch():
+        release.wait(5)
+        raise ValueError('no transcript')
+
+    def call():
+        try:
+            flight.do('key', fetch)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = run_concurrently(4, call)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ['no transcript'] * 4
+    assert flight.do('key', lambda: 'retry') == 'retry'
+
+
+def test_base_exception_in_leader_does_not_strand_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+    waiter_errors = []
+
+    def fetch():
+        release.wait(5)
+        raise KeyboardInterrupt
+
+    def leader():
+        with pytest.raises(KeyboardInterrupt):
+            flight.do('key', fetch)
+
+    def waiter():
+        try:
+            flight.do('key', lambda: 'unused')
+        except KeyboardInterrupt:
+            waiter_errors.append('interrupted')
+
+    leader_thread = threading.Thread(target=leader, daemon=True)
+    leader_thread.start()
+    time.sleep(0.05)  # leader owns the key
+    waiters = run_concurrently(3, waiter)
+    time.sleep(0.05)
+    release.set()
+
+    leader_thread.join(5)
+    for thread in waiters:
+        thread.join(5)
+        assert not thread.is_alive()
+    assert waiter_errors == ['interrupted'] * 3
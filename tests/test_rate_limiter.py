@@ -0,0 +1,164 @@
+"""Tests for the token bucket rate limiters"""
+
+import time
+
+import fakeredis
+import pytest
+import redis
+from flask import Flask
+
+import rate_limiter
+from rate_limiter import MemoryTokenBucket, RedisTokenBucket, token_bucket_limit
+
+
+class FakeClock:
+    """Stands in for time.monotonic_ns"""
+
+    def __init__(self):
+        self.now = 1_000_000_000
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += int(seconds * 1_000_000_000)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic_ns', fake)
+    return fake
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis, 'from_url',
+        staticmethod(lambda url: fakeredis.FakeRedis(server=server))
+    )
+    return server
+
+
+def test_memory_bucket_allows_burst_up_to_capacity(clock):
+    bucket = MemoryTokenBucket(capacity=3, period=60)
+    assert [bucket.allow('ip') for _ in range(4)] == [True, True, True, False]
+
+
+def test_memory_bucket_refills_one_token_per_interval(clock):
+    bucket = MemoryTokenBucket(capacity=3, period=60)
+    for _ in range(3):
+        bucket.allow('ip')
+
+    clock.advance(19.9)
+    assert not bucket.allow('ip')
+    clock.advance(0.1)
+    assert bucket.allow('ip')
+    assert not bucket.allow('ip')
+
+
+def test_memory_bucket_refill_is_exact_across_many_small_steps(clock):
+    # Denied requests still advance last_refill; integer units must not
+    # lose the partial refill between them
+    bucket = MemoryTokenBucket(capacity=1, period=1)
+    bucket.allow('ip')
+    for _ in range(999):
+        clock.advance(0.001)
+        assert not bucket.allow('ip')
+    clock.advance(0.001)
+    assert bucket.allow('ip')
+
+
+def test_memory_bucket_refill_is_capped_at_capacity(clock):
+    bucket = MemoryTokenBucket(capacity=2, period=60)
+    clock.advance(3600)
+    assert [bucket.allow('ip') for _ in range(3)] == [True, True, False]
+
+
+def test_memory_bucket_keys_are_independent(clock):
+    bucket = MemoryTokenBucket(capacity=1, period=60)
+    assert bucket.allow('a')
+    assert not bucket.allow('a')
+    assert bucket.allow('b')
+
+
+def test_memory_bucket_evicts_least_recently_seen_key(clock):
+    bucket = MemoryTokenBucket(capacity=1, period=3600, max_keys=2)
+    bucket.allow('a')
+    bucket.allow('b')
+    bucket.allow('a')  # 'a' is now the most recent, 'b' is evicted next
+    bucket.allow('c')
+
+    assert not bucket.allow('a')  # kept, still empty
+    assert bucket.allow('b')  # evicted, comes back full
+
+
+def test_redis_bucket_allows_burst_up_to_capacity(redis_server):
+    bucket = RedisTokenBucket('redis://test', capacity=3, period=60)
+    assert [bucket.allow('ip') for _ in range(4)] == [True, True, True, False]
+
+
+def test_redis_bucket_is_shared_between_instances(redis_server):
+    first = RedisTokenBucket('redis://test', capacity=2, period=60)
+    second = RedisTokenBucket('redis://test', capacity=2, period=60)
+    assert first.allow('ip')
+    assert second.allow('ip')
+    assert not first.allow('ip')
+    assert first.allow('other')
+
+
+def test_redis_bucket_refills_from_server_clock(redis_server):
+    # 5 tokens per second: one token every 200ms of Redis TIME
+    bucket = RedisTokenBucket('redis://test', capacity=5, period=1)
+    for _ in range(5):
+        assert bucket.allow('ip')
+    assert not bucket.allow('ip')
+
+    time.sleep(0.25)
+    assert bucket.allow('ip')
+    assert not bucket.allow('ip')
+
+
+def test_redis_bucket_expires_idle_keys(redis_server):
+    bucket = RedisTokenBucket('redis://test', capacity=50, period=3600)
+    bucket.allow('ip')
+
+    client = fakeredis.FakeRedis(server=redis_server)
+    ttl = client.pttl('bucket:ip')
+    # Expires once a full bucket would have refilled (one hour)
+    assert 0 < ttl <= 3600 * 1000
+    assert set(client.hgetall('bucket:ip')) == {b'tokens', b'ts'}
+
+
+def test_token_bucket_limit_returns_429_when_empty(clock):
+    app = Flask(__name__)
+    bucket = MemoryTokenBucket(capacity=1, period=60)
+
+    @app.route('/')
+    @token_bucket_limit(bucket, key_func=lambda: 'ip')
+    def index():
+        return 'ok'
+
+    client = app.test_client()
+    assert client.get('/').status_code == 200
+    assert client.get('/').status_code == 429
+
+
+def test_token_bucket_limit_fails_closed_when_redis_is_down():
+    app = Flask(__name__)
+
+    class BrokenBucket:
+        def allow(self, key):
+            raise redis.ConnectionError('Connection refused')
+
+    calls = []
+
+    @app.route('/')
+    @token_bucket_limit(BrokenBucket(), key_func=lambda: 'ip')
+    def index():
+        calls.append(1)
+        return 'ok'
+
+    assert app.test_client().get('/').status_code == 503
+    assert calls == []
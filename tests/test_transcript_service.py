@@ -0,0 +1,156 @@
+"""Tests for TranscriptService"""
+
+from array import array
+
+import pytest
+from youtube_transcript_api._errors import NoTranscriptFound, TranscriptsDisabled
+
+from conftest import FakeTranscript
+from transcript_service import DEFAULT_LANGUAGES, TranscriptSegments, TranscriptService
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s',
+    'https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ',
+    'https://m.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://youtu.be/dQw4w9WgXcQ',
+    'https://youtu.be/dQw4w9WgXcQ?si=abc',
+    'https://www.youtube.com/embed/dQw4w9WgXcQ',
+    'https://www.youtube.com/v/dQw4w9WgXcQ',
+    'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+    'youtube.com/watch?v=dQw4w9WgXcQ',
+    'dQw4w9WgXcQ',
+    # .*? must cross newlines, like the unanchored search it replaced
+    'x\nv=dQw4w9WgXcQ',
+    # Longer than the memoized URLs, so it takes the uncached path
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=' + 'a' * 300,
+])
+def test_extract_video_id_supported_formats(url):
+    assert TranscriptService.extract_video_id(url) == VIDEO_ID
+
+
+@pytest.mark.parametrize('url', [
+    '',
+    'dQw4w9WgXc',
+    'dQw4w9WgXcQQ',
+    'https://example.com/',
+    'dQw4w9WgXcQ\n\n',
+])
+def test_extract_video_id_rejects_other_input(url):
+    assert TranscriptService.extract_video_id(url) is None
+
+
+def test_extract_video_id_keeps_trailing_newline_of_bare_id():
+    # $ matches before one trailing newline; the input comes back unchanged,
+    # as before the single-regex rewrite (app.py strips URLs before this)
+    assert TranscriptService.extract_video_id('dQw4w9WgXcQ\n') == 'dQw4w9WgXcQ\n'
+
+
+def test_get_transcript_tries_requested_languages_before_defaults(youtube):
+    youtube.videos[VIDEO_ID] = [
+        FakeTranscript('pt', [(0.0, 'olá')]),
+        FakeTranscript('ja', [(0.0, 'こんにちは')])
+    ]
+    segments, language = TranscriptService.get_transcript(VIDEO_ID, ['ja', 'en'])
+    assert language == 'ja'
+    assert segments.texts == ['こんにちは']
+    assert youtube.lists[VIDEO_ID].requested == [['ja', 'en', 'pt', 'es', 'fr', 'de']]
+
+
+def test_get_transcript_drops_duplicate_languages(youtube):
+    youtube.videos[VIDEO_ID] = [FakeTranscript('pt', [(0.0, 'olá')])]
+    TranscriptService.get_transcript(VIDEO_ID, ['en', 'de', 'en'])
+    assert youtube.lists[VIDEO_ID].requested == [['en', 'de', 'pt', 'es', 'fr']]
+
+
+def test_get_transcript_defaults_without_requested_languages(youtube):
+    youtube.videos[VIDEO_ID] = [FakeTranscript('en', [(0.0, 'hi')])]
+    _, language = TranscriptService.get_transcript(VIDEO_ID)
+    assert language == 'en'
+    assert youtube.lists[VIDEO_ID].requested == [DEFAULT_LANGUAGES]
+
+
+def test_get_transcript_falls_back_to_any_language(youtube):
+    youtube.videos[VIDEO_ID] = [
+        FakeTranscript('ja', [(0.0, 'a'), (1.5, 'b')]),
+        FakeTranscript('ko', [(0.0, 'c')])
+    ]
+    segments, language = TranscriptService.get_transcript(VIDEO_ID, ['en'])
+    assert language == 'ja'
+    assert segments.texts == ['a', 'b']
+    assert list(segments.starts) == [0.0, 1.5]
+
+
+def test_get_transcript_raises_when_no_transcript_exists(youtube):
+    youtube.videos[VIDEO_ID] = []
+    with pytest.raises(NoTranscriptFound):
+        TranscriptService.get_transcript(VIDEO_ID, ['en'])
+
+
+def test_get_transcript_propagates_transcripts_disabled(youtube):
+    youtube.videos[VIDEO_ID] = TranscriptsDisabled(VIDEO_ID)
+    with pytest.raises(TranscriptsDisabled):
+        TranscriptService.get_transcript(VIDEO_ID, ['en'])
+
+
+@pytest.mark.parametrize('seconds, expected', [
+    (0, '00:00'),
+    (0.999, '00:00'),
+    (59.999, '00:59'),
+    (60, '01:00'),
+    (3599.999, '59:59'),
+    (3600, '01:00:00'),
+    (3661.5, '01:01:01'),
+    (36000, '10:00:00'),
+    # Negative starts keep the arithmetic path's result, wrapped into the hour
+    (-1.5, '59:58'),
+])
+def test_seconds_to_timestamp_boundaries(seconds, expected):
+    assert TranscriptService._seconds_to_timestamp(seconds) == expected
+
+
+def make_segments(*pairs):
+    """TranscriptSegments from (start, text) pairs"""
+    starts, texts = zip(*pairs) if pairs else ((), ())
+    return TranscriptSegments(
+        texts=list(texts),
+        starts=array('d', starts),
+        durations=array('d', [1.0] * len(texts))
+    )
+
+
+def test_format_transcript_prefixes_each_line_with_its_timestamp():
+    segments = make_segments(
+        (0.0, ' first '),
+        (59.999, 'second'),
+        (3599.999, 'last of the hour'),
+        (3600.0, 'first of the next'),
+        (36000.0, 'ten hours'),
+        (-1.5, 'negative')
+    )
+    assert TranscriptService.format_transcript(segments) == (
+        "[00:00] first\n"
+        "[00:59] second\n"
+        "[59:59] last of the hour\n"
+        "[01:00:00] first of the next\n"
+        "[10:00:00] ten hours\n"
+        "[59:58] negative"
+    )
+
+
+def test_format_transcript_skips_blank_segments():
+    segments = make_segments((0.0, 'a'), (1.0, '   '), (2.0, ''), (3.0, '\n'), (4.0, 'b'))
+    assert TranscriptService.format_transcript(segments) == "[00:00] a\n[00:04] b"
+
+
+def test_format_transcript_without_timestamps():
+    segments = make_segments((0.0, ' a '), (1.0, '  '), (3600.0, 'b'))
+    assert TranscriptService.format_transcript(segments, include_timestamps=False) == "a\nb"
+
+
+def test_format_transcript_of_no_segments_is_empty():
+    assert TranscriptService.format_transcript(make_segments()) == ""
+    assert TranscriptService.format_transcript(make_segments((0.0, ' ')), include_timestamps=False) == ""
@@ -3,9 +3,18 @@ YouTube Transcript Service
 Core logic for extracting and formatting YouTube video transcripts
 """
 
+import functools
+import os
 import re
+import threading
+from array import array
+from dataclasses import dataclass
+from operator import attrgetter
 from typing import Dict, List, Optional, Tuple
-from youtube_transcript_api import YouTubeTranscriptApi
+import requests
+from requests.adapters import HTTPAdapter
+from cachetools import TTLCache, cached
+from youtube_transcript_api import TranscriptList, YouTubeTranscriptApi
 from youtube_transcript_api._errors import (
     TranscriptsDisabled,
     NoTranscriptFound,
@@ -13,6 +22,73 @@ from youtube_transcript_api._errors import (
     InvalidVideoId
 )
 
+# Single pass over the URL: either a bare 11-char ID, or the first ID that
+# follows "v=" or a "/" (covers watch, embed, /v/ and youtu.be links).
+# (?s) lets .*? cross newlines, like the unanchored search it replaces.
+_VIDEO_ID_RE = re.compile(
+    r'(?s)(?:[a-zA-Z0-9_-]{11}$|.*?(?:v=|/)([a-zA-Z0-9_-]{11}))'
+)
+
+
+def _match_video_id(url: str) -> Optional[str]:
+    """Run _VIDEO_ID_RE over url and return the video ID, if any"""
+    match = _VIDEO_ID_RE.match(url)
+    if not match:
+        return None
+    # No group(1) means the bare-ID branch matched the whole input
+    return match.group(1) or url
+
+
+# Memo for short URLs only: longer client input is never kept alive in the
+# cache, which bounds it to about 4096 * 256 characters
+_MEMO_MAX_URL_LENGTH = 256
+_match_video_id_cached = functools.lru_cache(maxsize=4096)(_match_video_id)
+
+# Fallback languages tried after the ones requested by the client
+DEFAULT_LANGUAGES = ['pt', 'en', 'es', 'fr', 'de']
+
+# "MM:SS" for every second of the first hour, indexed by int(seconds)
+_MMSS_TABLE = tuple(f"{m:02d}:{s:02d}" for m in range(60) for s in range(60))
+# Same table as line prefixes ("[MM:SS] "), as written by format_transcript
+_MMSS_PREFIXES = tuple(f"[{timestamp}] " for timestamp in _MMSS_TABLE)
+
+# Transcript lists per video: 10 minutes TTL, max 2048 entries.
+# Shared by get_transcript and get_available_languages so both hit YouTube once.
+_transcript_list_cache = TTLCache(maxsize=2048, ttl=600)
+
+
+# One API client and one requests.Session for the whole process, so pooled
+# keep-alive connections to YouTube are reused across requests. Shared by
+# every worker thread, including through the Transcript objects cached in
+# _transcript_list_cache (each keeps a reference to this Session). The
+# library docstring calls YouTubeTranscriptApi not thread-safe because it owns
+# its Session; in 1.2.x (pinned <1.3 in requirements.txt) it only calls
+# get/post on it and sets its consent cookie through the cookie jar, which
+# takes its own lock, and headers are never changed after construction.
+_http_client = requests.Session()
+# One pooled connection per gunicorn thread; the default pool keeps only 10
+# and discards the rest once more requests than that run at the same time
+_POOL_SIZE = int(os.environ.get('GUNICORN_THREADS', 32))
+_http_client.mount('https://', HTTPAdapter(pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE))
+_api = YouTubeTranscriptApi(http_client=_http_client)
+
+
+@cached(_transcript_list_cache, lock=threading.Lock())
+def _list_transcripts(video_id: str) -> TranscriptList:
+    """List the transcripts available for a video (cached per video_id)"""
+    return _api.list(video_id)
+
+
+@dataclass
+class TranscriptSegments:
+    """Transcript segments as parallel columns (index i is segment i)"""
+    texts: List[str]
+    starts: array  # float64 seconds
+    durations: array  # float64 seconds
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+
 
 class TranscriptService:
     """Service for extracting YouTube video transcripts"""
@@ -29,27 +105,16 @@ class TranscriptService:
         - https://www.youtube.com/v/VIDEO_ID
         - VIDEO_ID (direct ID)
         """
-        # Direct video ID (11 characters)
-        if re.match(r'^[a-zA-Z0-9_-]{11}$', url):
-            return url
-        
-        # Standard youtube.com/watch?v=
-        match = re.search(r'(?:v=|/)([a-zA-Z0-9_-]{11})', url)
-        if match:
-            return match.group(1)
-        
-        # youtu.be short links
-        match = re.search(r'youtu\.be/([a-zA-Z0-9_-]{11})', url)
-        if match:
-            return match.group(1)
-        
-        return None
+        # Clients often resend the same URL, but only short ones are memoized
+        if len(url) <= _MEMO_MAX_URL_LENGTH:
+            return _match_video_id_cached(url)
+        return _match_video_id(url)
     
     @staticmethod
     def get_transcript(
         video_id: str, 
         languages: Optional[List[str]] = None
-    ) -> Tuple[List[Dict], str]:
+    ) -> Tuple[TranscriptSegments, str]:
         """
         Fetch transcript for a YouTube video
         Compatible with youtube-transcript-api 1.2.3+
@@ -59,113 +124,72 @@ class TranscriptService:
             languages: List of language codes to try (e.g., ['pt', 'en'])
         
         Returns:
-            Tuple of (transcript_list, language_used)
+            Tuple of (segments, language_used)
         
         Raises:
             Various YouTubeTranscriptApi exceptions
         """
+        # Helper function to convert FetchedTranscript to parallel columns
+        def convert_transcript(fetched_transcript):
+            snippets = fetched_transcript.snippets
+            return TranscriptSegments(
+                texts=list(map(attrgetter('text'), snippets)),
+                starts=array('d', map(attrgetter('start'), snippets)),
+                durations=array('d', map(attrgetter('duration'), snippets))
+            )
+        
+        # Requested languages first, then the defaults (order kept, no duplicates)
+        priority = list(dict.fromkeys((languages or []) + DEFAULT_LANGUAGES))
+        
+        transcript_list = _list_transcripts(video_id)
         try:
-            # Add custom headers to avoid blocking
-            import youtube_transcript_api._api
-            youtube_transcript_api._api.HEADERS = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9,pt-BR;q=0.8,pt;q=0.7',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            }
-            
-            # Create API instance
-            api = YouTubeTranscriptApi()
-            
-            # Helper function to convert FetchedTranscript to list of dicts
-            def convert_transcript(fetched_transcript):
-                return [
-                    {
-                        'text': snippet.text,
-                        'start': snippet.start,
-                        'duration': snippet.duration
-                    }
-                    for snippet in fetched_transcript
-                ]
-            
-            # If specific languages requested, try to fetch with those
-            if languages and len(languages) > 0:
-                try:
-                    fetched = api.fetch(video_id, languages=languages)
-                    return convert_transcript(fetched), languages[0]
-                except:
-                    pass  # Continue to fallback
-            
-            # Try default languages in order
-            default_languages = ['pt', 'en', 'es', 'fr', 'de']
-            
-            for lang in default_languages:
-                try:
-                    fetched = api.fetch(video_id, languages=[lang])
-                    return convert_transcript(fetched), lang
-                except:
-                    continue
-            
+            transcript = transcript_list.find_transcript(priority)
+        except NoTranscriptFound:
             # Last resort: get any available transcript
-            try:
-                # List available transcripts
-                available_transcripts = api.list(video_id)
-                if available_transcripts and len(available_transcripts) > 0:
-                    first_transcript = available_transcripts[0]
-                    fetched = api.fetch(video_id, languages=[first_transcript.language_code])
-                    return convert_transcript(fetched), first_transcript.language_code
-            except:
-                pass
-            
-            # If all fails, raise error
-            raise NoTranscriptFound(
-                video_id,
-                [],
-                "No transcripts found for this video"
-            )
-            
-        except Exception as e:
-            raise e
+            transcript = next(iter(transcript_list), None)
+            if transcript is None:
+                raise
+        
+        fetched = transcript.fetch()
+        return convert_transcript(fetched), transcript.language_code
     
     @staticmethod
     def format_transcript(
-        transcript_list: List[Dict], 
+        segments: TranscriptSegments, 
         include_timestamps: bool = True
     ) -> str:
         """
-        Format transcript list into readable text
+        Format transcript segments into readable text
         
         Args:
-            transcript_list: List of transcript segments from YouTubeTranscriptApi
+            segments: Transcript segments returned by get_transcript
             include_timestamps: Whether to include timestamps in output
         
         Returns:
             Formatted transcript string
         """
-        if not transcript_list:
+        if not segments:
             return ""
         
-        formatted_lines = []
-        
-        for segment in transcript_list:
-            text = segment.get('text', '').strip()
-            if not text:
-                continue
-            
-            if include_timestamps:
-                start_seconds = segment.get('start', 0)
-                timestamp = TranscriptService._seconds_to_timestamp(start_seconds)
-                formatted_lines.append(f"[{timestamp}] {text}")
-            else:
-                formatted_lines.append(text)
+        if not include_timestamps:
+            # map/filter run in C, no Python frame per segment
+            return "\n".join(filter(None, map(str.strip, segments.texts)))
         
-        return "\n".join(formatted_lines)
+        # Under an hour (most videos) each line is a table lookup plus one concat
+        prefixes = _MMSS_PREFIXES
+        to_timestamp = TranscriptService._seconds_to_timestamp
+        return "\n".join([
+            (prefixes[int(start)] if 0 <= start < 3600 else f"[{to_timestamp(start)}] ") + text
+            for start, text in zip(segments.starts, map(str.strip, segments.texts))
+            if text
+        ])
     
     @staticmethod
     def _seconds_to_timestamp(seconds: float) -> str:
         """Convert seconds to MM:SS or HH:MM:SS format"""
+        if 0 <= seconds < 3600:
+            return _MMSS_TABLE[int(seconds)]
+        
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
         secs = int(seconds % 60)
@@ -179,9 +203,7 @@ class TranscriptService:
     def get_available_languages(video_id: str) -> List[str]:
         """Get list of available transcript languages for a video"""
         try:
-            api = YouTubeTranscriptApi()
-            transcript_list = api.list(video_id)
-            return [t.language_code for t in transcript_list]
+            return [t.language_code for t in _list_transcripts(video_id)]
         except Exception:
             return []
     